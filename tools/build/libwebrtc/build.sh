@@ -40,7 +40,9 @@ Builds Chromium's WebRTC component.
 OPTIONS:
     -h              Show this message.
     -v              Verbose mode. Print all executed commands.
-    -c BUILD_CONFIG Build configuration. Default is 'Release'. Possible values are: 'Debug', 'Release'.
+    -c BUILD_CONFIG Build configuration(s). Default is 'Release'. Possible values are: 'Debug', 'Release'.
+                    A comma-separated list (e.g. 'Debug,Release') builds all the listed configurations
+                    concurrently; each configuration writes to its own output directory.
     -p              Prepare the build (generate ninja files) without running it. This is generally not
                     needed, as the default is to both prepare and build. Mainly useful for CI.
     -b              Build without prepare. This requires a previous prepare pass. This is generally not
@@ -48,6 +50,29 @@ OPTIONS:
 EOF
 }
 
+#-----------------------------------------------------------------------------
+# Split the comma-separated -c argument into BUILD_CONFIGS and validate each
+# entry. Called directly from option parsing so a bad configuration name
+# fails immediately, before any config files are read. Duplicate entries are
+# dropped (keeping the first occurrence): concurrent variants rely on every
+# configuration writing to its own output directory, so building the same
+# configuration twice in parallel would race in one directory.
+function parse-build-configs() {
+    local entries cfg
+    IFS=',' read -r -a entries <<< "$1"
+    BUILD_CONFIGS=()
+    for cfg in "${entries[@]}"; do
+        if [[ "$cfg" != "Debug" && "$cfg" != "Release" ]]; then
+            echo -e "${C_DEF}Unknown build configuration: ${C_RED}$cfg${C_DEF}" >&2
+            exit 1
+        fi
+        case " ${BUILD_CONFIGS[*]} " in
+        *" $cfg "*) ;;
+        *) BUILD_CONFIGS+=("$cfg") ;;
+        esac
+    done
+}
+
 #-----------------------------------------------------------------------------
 function verify-arguments() {
     VERBOSE=${VERBOSE:-0}
@@ -59,18 +84,81 @@ function verify-arguments() {
       BUILD=1
     fi
     BUILD_CONFIG=${BUILD_CONFIG:-Release}
+    # -c was already split and validated at parse time; this covers the
+    # default when the option was not given.
+    [ -n "${BUILD_CONFIGS+x}" ] || parse-build-configs "$BUILD_CONFIG"
     DEPOT_TOOLS_DIR=$WORK_DIR/depot_tools
-    PATH=$DEPOT_TOOLS_DIR:$DEPOT_TOOLS_DIR/python276_bin:$PATH
+    ensure-depot-tools-on-path
     # Print all executed commands?
     [ "$VERBOSE" = 1 ] && set -x || true
-    echo -e "\e[39mBuild configuration: \e[96m$BUILD_CONFIG\e[39m"
-    # Verify build config
-    if [[ "$BUILD_CONFIG" != "Debug" && "$BUILD_CONFIG" != "Release" ]]; then
-        echo -e "\e[39mUnknown build configuration: \e[91m$BUILD_CONFIG\e[39m"
-        exit 1
+    local cfg
+    for cfg in "${BUILD_CONFIGS[@]}"; do
+        echo -e "${C_DEF}Build configuration: ${C_CYAN}$cfg${C_DEF}"
+    done
+    # Use a compiler cache when available; object files are identical across
+    # many variants, so this is a large win for repeated builds. sccache is
+    # detected first (unlike ccache it also supports MSVC, for Windows-hosted
+    # builds), falling back to ccache. Detected once here; configure-build
+    # adds it to the gn args as cc_wrapper. Setting CC_WRAPPER to an empty
+    # value disables both the detection and the cache.
+    CC_WRAPPER=${CC_WRAPPER-$(command -v sccache || command -v ccache || true)}
+    if [ -n "$CC_WRAPPER" ]; then
+        echo -e "${C_DEF}Compiler cache: ${C_CYAN}$CC_WRAPPER${C_DEF}"
+        # Share a single work-dir-local cache between all variants.
+        export SCCACHE_DIR=${SCCACHE_DIR:-$WORK_DIR/.sccache}
+        export CCACHE_DIR=${CCACHE_DIR:-$WORK_DIR/.ccache}
+    fi
+    # When several ninja builds run concurrently, split the available
+    # processors evenly between them to avoid oversubscribing the cores.
+    NINJA_JOBS=""
+    if [ ${#BUILD_CONFIGS[@]} -gt 1 ]; then
+        NINJA_JOBS=$(( $(nproc) / ${#BUILD_CONFIGS[@]} ))
+        [ $NINJA_JOBS -ge 1 ] || NINJA_JOBS=1
     fi
 }
 
+#-----------------------------------------------------------------------------
+# Build a single configuration. Runs in a subshell when several configurations
+# are built concurrently, so it must not mutate the parent shell state.
+function build-variant() {
+    BUILD_CONFIG=$1
+    echo -e "${C_DEF}Building: ${C_CYAN}$TARGET_OS/$TARGET_CPU/$BUILD_CONFIG${C_DEF}"
+    # Generate the WebRTC Ninja build config files
+    [ $PREPARE = '0' ] || configure-build
+    # Run the WebRTC Ninja build
+    [ $BUILD = '0' ] || compile-webrtc
+    # Package the build artifacts for the current platform
+    [ $BUILD = '0' ] || package-webrtc
+    # Print paths to build artifacts
+    [ $BUILD = '0' ] || print-summary
+}
+
+#-----------------------------------------------------------------------------
+# Build all configurations of BUILD_CONFIGS concurrently. The variants write
+# to disjoint out/<os>/<cpu>/<config> directories and only share the
+# (read-only) checked-out sources, so they can safely run in parallel; total
+# wall-time approaches that of the slowest variant instead of the sum of all.
+# Each variant streams its output live, every line tagged with the variant
+# name, so progress is visible as it happens and the interleaved lines remain
+# attributable. The prefixing runs in a process substitution rather than a
+# pipeline so \$! (and wait) reports the status of the variant itself.
+function build-all-variants() {
+    local pids=() cfg i rv=0
+    for cfg in "${BUILD_CONFIGS[@]}"; do
+        build-variant "$cfg" > >(prefix-lines "[$TARGET_OS/$TARGET_CPU/$cfg] ") 2>&1 &
+        pids+=($!)
+    done
+    for i in "${!pids[@]}"; do
+        local variant_rv=0
+        wait "${pids[$i]}" || variant_rv=$?
+        if [ $variant_rv != 0 ]; then
+            echo -e "${C_RED}Build failed for configuration ${BUILD_CONFIGS[$i]} (exit code $variant_rv)${C_DEF}"
+            rv=$variant_rv
+        fi
+    done
+    return $rv
+}
+
 #-----------------------------------------------------------------------------
 function print-summary() {
     local config_path="$TARGET_OS/$TARGET_CPU/$BUILD_CONFIG"
@@ -78,9 +166,9 @@ function print-summary() {
 
     case $TARGET_OS in
     "android")
-        echo -e "\e[39mStatic library : \e[96m$outdir_full/obj/libwebrtc.a\e[39m"
-        echo -e "\e[39mAndroid Archive: \e[96m$outdir_full/libwebrtc.aar\e[39m"
-        echo -e "\e[39mHeader path    : \e[96m$SRC_DIR\e[39m"
+        echo -e "${C_DEF}Static library : ${C_CYAN}$outdir_full/obj/libwebrtc.a${C_DEF}"
+        echo -e "${C_DEF}Android Archive: ${C_CYAN}$outdir_full/libwebrtc.aar${C_DEF}"
+        echo -e "${C_DEF}Header path    : ${C_CYAN}$SRC_DIR${C_DEF}"
         ;;
     *)
         echo "TODO: print build summary for $TARGET_OS"
@@ -93,17 +181,15 @@ function write-cmakelists-config() {
     local filename="$BUILD_DIR/.libwebrtc.cmake"
     local libwebrtc_src_dir=$WORK_DIR
     local libwebrtc_out_dir=$SRC_DIR/src/out/$TARGET_OS/$TARGET_CPU/$BUILD_CONFIG
-    local libwebrtc_src_dir_win=$libwebrtc_src_dir
-    local libwebrtc_out_dir_win=$libwebrtc_out_dir
+    local libwebrtc_src_dir_win
+    local libwebrtc_out_dir_win
     # Attempt to discover the drive letter and convert it to Windows path format.
     # This is helpful in a hybrid environment like WSL2 where later parts of the
     # build happen Windows-side. This isn't a very robust check and may produce
     # invalid Windows paths. Hopefully only in the case where WSL2/Windows isn't
     # relevant.
-    libwebrtc_src_dir_win=$(echo $libwebrtc_src_dir_win | sed -E -r 's!^/mnt/(.)/!\U\1\\:\\\\!')
-    libwebrtc_out_dir_win=$(echo $libwebrtc_out_dir_win | sed -E -r 's!^/mnt/(.)/!\U\1\\:\\\\!')
-    libwebrtc_src_dir_win=$(echo $libwebrtc_src_dir_win | sed -E 's!/!\\\\!g')
-    libwebrtc_out_dir_win=$(echo $libwebrtc_out_dir_win | sed -E 's!/!\\\\!g')
+    to-windows-path libwebrtc_src_dir_win "$libwebrtc_src_dir"
+    to-windows-path libwebrtc_out_dir_win "$libwebrtc_out_dir"
     cat >$filename <<EOF
 # Generated file. Do not edit.
 if(CMAKE_HOST_SYSTEM_NAME STREQUAL "Windows")
@@ -128,7 +214,7 @@ EOF
 
 #-----------------------------------------------------------------------------
 function copy-artifacts-to-unity-sample() {
-    echo -e "\e[39mCopying build artifacts for $TARGET_OS/$TARGET_CPU/$BUILD_CONFIG\e[39m"
+    echo -e "${C_DEF}Copying build artifacts for $TARGET_OS/$TARGET_CPU/$BUILD_CONFIG${C_DEF}"
     case $TARGET_OS in
     "android")
         local config_path="$TARGET_OS/$TARGET_CPU/$BUILD_CONFIG"
@@ -141,7 +227,7 @@ function copy-artifacts-to-unity-sample() {
         "x64") arch="x86_64" ;;
         esac
         local src="$SRC_DIR/src/$outdir/libwebrtc.aar"
-        local dst="../../../libs/Microsoft.MixedReality.WebRTC.Unity/Assets/Plugins/$arch/"
+        local dst="$ROOT_DIR/libs/Microsoft.MixedReality.WebRTC.Unity/Assets/Plugins/$arch/"
         echo "Copying libwebrtc.aar to Unity sample project."
         mkdir -p "$dst" && cp "$src" "$_"
         ;;
@@ -158,7 +244,7 @@ function copy-artifacts-to-unity-sample() {
 # Read command line
 while getopts c:vpbh OPTION; do
     case ${OPTION} in
-    c) BUILD_CONFIG=$OPTARG ;;
+    c) BUILD_CONFIG=$OPTARG && parse-build-configs "$OPTARG" ;;
     v) VERBOSE=1 ;;
     p) PREPARE=1 ;;
     b) BUILD=1 ;;
@@ -175,20 +261,25 @@ verify-checkout-config
 # Ensure all arguments have reasonable values
 verify-arguments
 
-# Compile and package webrtc library
-echo -e "\e[39mBuilding: \e[96m$TARGET_OS/$TARGET_CPU/$BUILD_CONFIG\e[39m"
+# Resolve the build tools once, now that depot_tools is on PATH
+[ $PREPARE = '0' ] || resolve-tool GN_BIN gn
+[ $BUILD = '0' ] || resolve-tool NINJA_BIN ninja
 
-# Generate the WebRTC Ninja build config files
-[ $PREPARE = '0' ] || configure-build
+# Serialize the gn arguments shared by all configurations, once
+compute-gn-args-base
 
-# Run the WebRTC Ninja build
-[ $BUILD = '0' ] || compile-webrtc
-
-# Package the build artifacts for the current platform
-[ $BUILD = '0' ] || package-webrtc
+# Compile and package webrtc library. The checkout is shared by all variants
+# and was fully created by checkout.sh (verified above), so concurrent
+# variants never race on it.
+if [ ${#BUILD_CONFIGS[@]} = 1 ]; then
+    build-variant "${BUILD_CONFIGS[0]}"
+else
+    build-all-variants
+fi
 
-# Print paths to build artifacts
-[ $BUILD = '0' ] || print-summary
+# The generated config files below are single-config; when building several
+# configurations, the last one listed wins.
+BUILD_CONFIG=${BUILD_CONFIGS[${#BUILD_CONFIGS[@]}-1]}
 
 # Write file ./.libwebrtc.cmake
 write-cmakelists-config
@@ -200,7 +291,7 @@ write-build-config
 [ $BUILD = '0' ] || copy-artifacts-to-unity-sample
 
 if [ $BUILD = '0' ]; then
-  echo -e "\e[39m\e[1mPrepare complete.\e[0m\e[39m"
+  echo -e "${C_DEF}${C_BOLD}Prepare complete.${C_RESET}${C_DEF}"
 else
-  echo -e "\e[39m\e[1mBuild complete.\e[0m\e[39m"
+  echo -e "${C_DEF}${C_BOLD}Build complete.${C_RESET}${C_DEF}"
 fi
@@ -49,7 +49,7 @@ function verify-arguments() {
     REPO_URL="https://webrtc.googlesource.com/src"
     DEPOT_TOOLS_URL="https://chromium.googlesource.com/chromium/tools/depot_tools.git"
     DEPOT_TOOLS_DIR=$WORK_DIR/depot_tools
-    PATH=$DEPOT_TOOLS_DIR:$DEPOT_TOOLS_DIR/python276_bin:$PATH
+    ensure-depot-tools-on-path
     # Print all executed commands?
     [ "$VERBOSE" = 1 ] && set -x || true
 }
@@ -89,6 +89,11 @@ create-WORK_DIR-and-cd
 # Checkout depot tools
 checkout-depot-tools
 
+# Resolve the depot_tools entry points once, now that they are on PATH
+resolve-tool FETCH_BIN fetch
+resolve-tool GCLIENT_BIN gclient
+resolve-tool DFGS_BIN download_from_google_storage
+
 # Checkout WebRTC source for the target platform
 checkout-webrtc
 
@@ -98,5 +103,5 @@ verify-webrtc-deps
 # Write file ./.checkout.sh
 write-config ".checkout.sh"
 
-echo -e "\e[39m\e[1mCheckout complete.\e[0m\e[39m"
-echo -e "\e[39m\e[1mNext step:\e[0m run ./build.sh\e[39m"
+echo -e "${C_DEF}${C_BOLD}Checkout complete.${C_RESET}${C_DEF}"
+echo -e "${C_DEF}${C_BOLD}Next step:${C_RESET} run ./build.sh${C_DEF}"
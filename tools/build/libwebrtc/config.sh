@@ -85,6 +85,9 @@ done
 # Ensure all arguments have reasonable values
 verify-arguments
 
+# Verify the target OS/CPU combination is supported
+verify-target-triple
+
 # Check host requirements
 [ "$NO_DISK_SPACE" = 0 ] && check-host-disk-space || true
 [ "$UNSUPPORTED" = 0 ] && check-host-os || true
@@ -95,5 +98,5 @@ print-config
 # Write file ./.config.sh
 write-config ".config.sh"
 
-echo -e "\e[39m\e[1mConfig complete.\e[0m\e[39m"
-echo -e "\e[39m\e[1mNext step:\e[0m run ./checkout.sh\e[39m"
+echo -e "${C_DEF}${C_BOLD}Config complete.${C_RESET}${C_DEF}"
+echo -e "${C_DEF}${C_BOLD}Next step:${C_RESET} run ./checkout.sh${C_DEF}"
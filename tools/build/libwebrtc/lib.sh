@@ -1,17 +1,37 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License.
 
+#=============================================================================
+# ANSI color escapes, built once when this file is sourced. The messages below
+# reference these instead of respelling (and re-decoding) the raw escape
+# sequences inline on every print.
+
+C_DEF=$'\e[39m'      # default foreground
+C_CYAN=$'\e[96m'     # bright cyan: values and highlights
+C_RED=$'\e[91m'      # bright red: errors
+C_DARKRED=$'\e[31m'  # red: errors
+C_GRAY=$'\e[90m'     # gray: verbose details
+C_BOLD=$'\e[1m'      # bold
+C_RESET=$'\e[0m'     # reset all attributes
+
+#=============================================================================
+# Repository root, derived once from the (already canonical) BUILD_DIR set by
+# the sourcing script. The repository layout is fixed, so stripping the known
+# suffix is enough; no realpath process is needed.
+
+ROOT_DIR=${BUILD_DIR%/tools/build/libwebrtc}
+
 #=============================================================================
 # Library functions
 
 #-----------------------------------------------------------------------------
 # Check build host disk space is at least 40GB
 function check-host-disk-space() {
-    echo -e "\e[39mChecking host disk space...\e[39m"
-    local AVAIL=$(df -B1 --output=avail $(pwd) | tail -1)
+    echo -e "${C_DEF}Checking host disk space...${C_DEF}"
+    local AVAIL=$(df -B1 --output=avail "$PWD" | tail -1)
     if (( $AVAIL < 40000000000 )); then
-        echo -e "\e[31mERROR: Insufficent disk space (need at least 40GB)\n" \
-        "$(df -h $(pwd))\e[39m" >&2
+        echo -e "${C_DARKRED}ERROR: Insufficent disk space (need at least 40GB)\n" \
+        "$(df -h "$PWD")${C_DEF}" >&2
         exit 1
     fi
 }
@@ -19,13 +39,13 @@ function check-host-disk-space() {
 #-----------------------------------------------------------------------------
 # Check build host OS version (required by Google scripts)
 function check-host-os() {
-    echo -e "\e[39mChecking host OS...\e[39m"
+    echo -e "${C_DEF}Checking host OS...${C_DEF}"
     # Same check as Chrome's install-build-deps.sh
     # https://chromium.googlesource.com/chromium/src/+/f34485ffde/build/install-build-deps.sh
     # This is for m71; ideally we'd want to have a dynamic check for the
     # actual branch selected.
     if ! which lsb_release > /dev/null; then
-        echo "\e[32mERROR: lsb_release not found in \$PATH\e[39m" >&2
+        echo -e "${C_RED}ERROR: lsb_release not found in \$PATH${C_DEF}" >&2
         exit 1;
     fi
     distro_codename=$(lsb_release --codename --short)
@@ -36,47 +56,73 @@ function check-host-os() {
     supported_ids="(Debian)"
     if [[ ! $distro_codename =~ $supported_codenames &&
           ! $distro_id =~ $supported_ids ]]; then
-        echo -e "\e[31mERROR: The only distros supported by the Google scripts for M71 are\n" \
+        echo -e "${C_DARKRED}ERROR: The only distros supported by the Google scripts for M71 are\n" \
         "\tUbuntu 14.04 LTS (trusty)\n" \
         "\tUbuntu 16.04 LTS (xenial)\n" \
         "\tUbuntu 17.10 (artful)\n" \
         "\tUbuntu 18.04 LTS (bionic)\n" \
         "\tDebian 8 (jessie) or later\n" \
-        "Attempting to install anyway might fail, so aborting.\e[39m" >&2
+        "Attempting to install anyway might fail, so aborting.${C_DEF}" >&2
         exit 1
     fi
 }
 
+#-----------------------------------------------------------------------------
+# Validate the (TARGET_OS, TARGET_CPU) pair against the table of combinations
+# the build supports. A single case lookup keeps the rules self-documenting
+# and rejects a bad combination at config time instead of deep inside the
+# checkout or build.
+function verify-target-triple() {
+    case "$TARGET_OS/$TARGET_CPU" in
+    android/arm | android/arm64 | android/x86 | android/x64 | \
+    ios/arm | ios/arm64 | ios/x64 | \
+    linux/x86 | linux/x64 | linux/arm | linux/arm64 | \
+    mac/x64 | \
+    win/x86 | win/x64 | win/arm64)
+        ;;
+    *)
+        echo -e "${C_RED}Unsupported target combination: $TARGET_OS/$TARGET_CPU${C_DEF}" >&2
+        exit 1
+        ;;
+    esac
+}
+
 #-----------------------------------------------------------------------------
 function print-config() {
-    echo -e "\e[39mTarget OS: \e[96m$TARGET_OS\e[39m"
-    echo -e "\e[39mTarget CPU \e[96m$TARGET_CPU\e[39m"
-    echo -e "\e[39mGit Branch: \e[96m$BRANCH\e[39m"
-    echo -e "\e[39mWorking dir: \e[96m$WORK_DIR\e[39m"
-    [[ "$FAST_CLONE" == "1" ]] && echo -e "\e[96mUsing fast clone for CI\e[39m" || true
+    echo -e "${C_DEF}Target OS: ${C_CYAN}$TARGET_OS${C_DEF}"
+    echo -e "${C_DEF}Target CPU ${C_CYAN}$TARGET_CPU${C_DEF}"
+    echo -e "${C_DEF}Git Branch: ${C_CYAN}$BRANCH${C_DEF}"
+    echo -e "${C_DEF}Working dir: ${C_CYAN}$WORK_DIR${C_DEF}"
+    [[ "$FAST_CLONE" == "1" ]] && echo -e "${C_CYAN}Using fast clone for CI${C_DEF}" || true
 }
 
 #-----------------------------------------------------------------------------
 function read-config() {
     if [ ! -f "$BUILD_DIR/.config.sh" ]; then
-        echo -e "\e[39mWebRTC configuration not set.\e[39m"
-        echo -e "\e[39mRun ./config.sh first.\e[39m"
+        echo -e "${C_DEF}WebRTC configuration not set.${C_DEF}"
+        echo -e "${C_DEF}Run ./config.sh first.${C_DEF}"
         exit 1
     fi
     source "$BUILD_DIR/.config.sh"
     SRC_DIR=$WORK_DIR/webrtc
     # Print a config summary
-    echo -e "\e[39m\e[1mActive config:\e[0m\e[39m"
+    echo -e "${C_DEF}${C_BOLD}Active config:${C_RESET}${C_DEF}"
     print-config
 }
 
 #-----------------------------------------------------------------------------
 function write-config() {
-    # Ensure WORK_DIR is an absolute path so that various operations after
-    # config do not depend on the location where config was called.
+    # Ensure WORK_DIR is a canonical absolute path so that various operations
+    # after config do not depend on the location where config was called.
+    # Always canonicalize, even already-absolute input: checkout.sh writes
+    # .checkout.sh with a pwd -P canonicalized WORK_DIR, and
+    # verify-checkout-config compares the two files byte-for-byte, so e.g. a
+    # trailing slash in -d would otherwise wedge that check forever.
     WORK_DIR=$(realpath $WORK_DIR)
+    # Write atomically (tmp + rename): verify-checkout-config compares these
+    # files byte-for-byte, and a partially written file would wedge it.
     local filename="$BUILD_DIR/$1"
-    cat >$filename <<EOF
+    cat >$filename.tmp <<EOF
 # Generated file. Do not edit.
 TARGET_OS=$TARGET_OS
 TARGET_CPU=$TARGET_CPU
@@ -84,25 +130,93 @@ BRANCH=$BRANCH
 WORK_DIR=$WORK_DIR
 FAST_CLONE=$FAST_CLONE
 EOF
+    mv -f $filename.tmp $filename
+}
+
+#-----------------------------------------------------------------------------
+# Prepend a directory to PATH unless it is already on it. The membership test
+# is a single in-shell pattern match over the colon-delimited string, so no
+# per-entry normalization or process is spawned, and PATH does not grow with
+# duplicates across repeated script runs in the same shell.
+function prepend-path-once() {
+    local dir=$1
+    case ":$PATH:" in
+    *":$dir:"*) ;;
+    *) PATH=$dir:$PATH ;;
+    esac
+}
+
+#-----------------------------------------------------------------------------
+# Put the depot_tools directories on PATH, once. An environment marker
+# records which depot_tools dir has been set up; child invocations (CI steps
+# commonly launch checkout.sh and build.sh from one parent shell) inherit it
+# and skip even the PATH membership scan with a single string comparison.
+function ensure-depot-tools-on-path() {
+    [ "${MRWEBRTC_DEPOT_TOOLS_READY:-}" = "$DEPOT_TOOLS_DIR" ] && return || true
+    prepend-path-once "$DEPOT_TOOLS_DIR/python276_bin"
+    prepend-path-once "$DEPOT_TOOLS_DIR"
+    export MRWEBRTC_DEPOT_TOOLS_READY=$DEPOT_TOOLS_DIR
+}
+
+#-----------------------------------------------------------------------------
+# Copy stdin to stdout, prepending a fixed prefix to every line. Used to tag
+# the output of concurrently running build variants so their interleaved
+# lines remain attributable to a variant.
+function prefix-lines() {
+    local prefix=$1 line
+    while IFS= read -r line; do
+        printf '%s%s\n' "$prefix" "$line"
+    done
+    # Flush a trailing line without a final newline, if any.
+    [ -z "$line" ] || printf '%s%s\n' "$prefix" "$line"
+}
+
+#-----------------------------------------------------------------------------
+# resolve-tool VAR NAME: resolve NAME on PATH once and store its absolute
+# path into VAR. Call sites then invoke the resolved path directly, skipping
+# a PATH scan per invocation, and a missing tool is reported up-front with a
+# clear message instead of failing somewhere mid-build.
+function resolve-tool() {
+    local path
+    path=$(command -v "$2") || {
+        echo -e "${C_RED}Required tool not found on PATH: $2${C_DEF}" >&2
+        exit 1
+    }
+    printf -v "$1" '%s' "$path"
+}
+
+#-----------------------------------------------------------------------------
+# to-windows-path VAR PATH: store into VAR the CMake-escaped Windows form of
+# PATH, mapping a WSL mount prefix (/mnt/c/...) to a drive letter (C\:\\...).
+# Uses only shell string operations so no extra processes are spawned per
+# conversion (the previous echo+sed pipelines cost four forks per path).
+function to-windows-path() {
+    local p=$2 sep='\\'
+    if [[ $p =~ ^/mnt/(.)/(.*) ]]; then
+        p="${BASH_REMATCH[1]^^}"'\:\\'"${BASH_REMATCH[2]}"
+    fi
+    # Quote the replacement so its backslashes stay literal regardless of
+    # the patsub_replacement shell option.
+    printf -v "$1" '%s' "${p//\//"$sep"}"
 }
 
 #-----------------------------------------------------------------------------
 function verify-checkout-config() {
     if [ ! -f "$BUILD_DIR/.config.sh" ]; then
-        echo -e "\e[39mWebRTC configuration not set.\e[39m"
-        echo -e "\e[39mRun ./config.sh first.\e[39m"
+        echo -e "${C_DEF}WebRTC configuration not set.${C_DEF}"
+        echo -e "${C_DEF}Run ./config.sh first.${C_DEF}"
         exit 1
     fi
     if [ ! -f "$BUILD_DIR/.checkout.sh" ]; then
-        echo -e "\e[39mWebRTC checkout configuration not set.\e[39m"
-        echo -e "\e[39mRun ./checkout.sh first.\e[39m"
+        echo -e "${C_DEF}WebRTC checkout configuration not set.${C_DEF}"
+        echo -e "${C_DEF}Run ./checkout.sh first.${C_DEF}"
         exit 1
     fi
     local config_sh=$(cat "$BUILD_DIR/.config.sh")
     local checkout_sh=$(cat "$BUILD_DIR/.checkout.sh")
     if [ "$checkout_sh" != "$config_sh" ]; then
-        echo -e "\e[39mWebRTC configuration has changed since last checkout.\e[39m"
-        echo -e "\e[39mRun ./checkout.sh again.\e[39m"
+        echo -e "${C_DEF}WebRTC configuration has changed since last checkout.${C_DEF}"
+        echo -e "${C_DEF}Run ./checkout.sh again.${C_DEF}"
         exit 1
     fi
 }
@@ -110,17 +224,18 @@ function verify-checkout-config() {
 #-----------------------------------------------------------------------------
 function write-build-config() {
     local filename="$BUILD_DIR/.build.sh"
-    cat >$filename <<EOF
+    cat >$filename.tmp <<EOF
 # Generated file. Do not edit.
 BUILD_CONFIG=$BUILD_CONFIG
 EOF
+    mv -f $filename.tmp $filename
 }
 
 #-----------------------------------------------------------------------------
 function read-build-config() {
     if [ ! -f "$BUILD_DIR/.build.sh" ]; then
-        echo -e "\e[39mWebRTC build configuration not set.\e[39m"
-        echo -e "\e[39mRun ./build.sh first.\e[39m"
+        echo -e "${C_DEF}WebRTC build configuration not set.${C_DEF}"
+        echo -e "${C_DEF}Run ./build.sh first.${C_DEF}"
         exit 1
     fi
     source "$BUILD_DIR/.build.sh"
@@ -133,7 +248,7 @@ function detect-host-os() {
     linux*) HOST_OS=${HOST_OS:-linux} ;;
     win32* | msys*) HOST_OS=${HOST_OS:-win} ;;
     *)
-        echo -e "\e[91mBuilding on unsupported OS: $OSTYPE\e[39m" && exit 1
+        echo -e "${C_RED}Building on unsupported OS: $OSTYPE${C_DEF}" && exit 1
         ;;
     esac
 }
@@ -142,7 +257,7 @@ function detect-host-os() {
 function verify-host-os() {
     if [[ $TARGET_OS == 'android' && $HOST_OS != 'linux' ]]; then
         # As per notes at http://webrtc.github.io/webrtc-org/native-code/android/
-        echo -e "\e[91mERROR: Android compilation is only supported on Linux.\e[39m"
+        echo -e "${C_RED}ERROR: Android compilation is only supported on Linux.${C_DEF}"
         exit 1
     fi
 }
@@ -166,7 +281,7 @@ function verify-host-platform-deps() {
 
 #-----------------------------------------------------------------------------
 function checkout-depot-tools() {
-    echo -e "\e[39mCloning depot tools -- this may take some time\e[39m"
+    echo -e "${C_DEF}Cloning depot tools -- this may take some time${C_DEF}"
     if [ ! -d $DEPOT_TOOLS_DIR ]; then
         git clone -q $DEPOT_TOOLS_URL $DEPOT_TOOLS_DIR
         if [ $HOST_OS = 'win' ]; then
@@ -184,32 +299,50 @@ function checkout-depot-tools() {
 
 #-----------------------------------------------------------------------------
 function checkout-webrtc() {
-    echo -e "\e[39mCloning WebRTC source -- this may take a long time\e[39m"
+    echo -e "${C_DEF}Cloning WebRTC source -- this may take a long time${C_DEF}"
     pushd $SRC_DIR >/dev/null
 
+    # The sync and the manual hook downloads below depend only on the pinned
+    # revision. When a previous run already synced that exact revision, skip
+    # them entirely so re-running checkout.sh (e.g. once per variant in CI)
+    # costs next to nothing; all variants then share the one checkout.
+    local sync_stamp=".last-sync-revision"
+    if [[ -d src && -f $sync_stamp ]] && [ "$(cat $sync_stamp)" = "$REVISION" ]; then
+        echo -e "${C_DEF}WebRTC checkout already at revision ${C_CYAN}$REVISION${C_DEF}; skipping sync${C_DEF}"
+        popd >/dev/null
+        return
+    fi
+
+    # Fail fast on stalled connections (below 1 KB/s for 60s) instead of
+    # hanging the whole checkout on one bad mirror.
+    export GIT_HTTP_LOW_SPEED_LIMIT=1000
+    export GIT_HTTP_LOW_SPEED_TIME=60
+
     # Fetch only the first-time, otherwise sync.
     local extra_fetch=""
     [[ "$FAST_CLONE" == "1" ]] && extra_fetch+="--no-history" || true
     if [ ! -d src ]; then
-        echo -e "\e[39mDoing first-time WebRTC clone -- this may take a long time\e[39m"
+        echo -e "${C_DEF}Doing first-time WebRTC clone -- this may take a long time${C_DEF}"
         case $TARGET_OS in
         android)
-            yes | fetch --nohooks $extra_fetch webrtc_android
+            yes | "$FETCH_BIN" --nohooks $extra_fetch webrtc_android
             ;;
         ios)
-            fetch --nohooks $extra_fetch webrtc_ios
+            "$FETCH_BIN" --nohooks $extra_fetch webrtc_ios
             ;;
         *)
-            fetch --nohooks $extra_fetch webrtc
+            "$FETCH_BIN" --nohooks $extra_fetch webrtc
             ;;
         esac
     fi
 
     # Checkout the specific revision after fetch.
-    echo -e "\e[39mSyncing WebRTC deps -- this may take a long time\e[39m"
+    echo -e "${C_DEF}Syncing WebRTC deps -- this may take a long time${C_DEF}"
     local extra_sync=""
     [[ "$FAST_CLONE" == "1" ]] && extra_sync+=" --no-history --shallow --nohooks" || true
-    gclient sync --force --revision $REVISION $extra_sync
+    # The WebRTC checkout is made of many independent sub-repos; sync them in
+    # parallel (-j is gclient's native parallelism) instead of one at a time.
+    "$GCLIENT_BIN" sync --force --revision $REVISION -j $(nproc) $extra_sync
 
     # Run hooks on specific revision to e.g. download the prebuilt gn
     # This takes 3.5 GB of disk, and most of it is useless for the build
@@ -224,7 +357,7 @@ function checkout-webrtc() {
     # set of hooks manually
 
     # Download gn prebuilt executable
-    download_from_google_storage --no_resume --platform=linux\* --no_auth --bucket chromium-gn -s src/buildtools/linux64/gn.sha1
+    "$DFGS_BIN" --no_resume --platform=linux\* --no_auth --bucket chromium-gn -s src/buildtools/linux64/gn.sha1
 
     # Download clang prebuilt executable
     python src/tools/clang/scripts/update.py
@@ -235,6 +368,11 @@ function checkout-webrtc() {
     # Create LASTCHANGE and LASTCHANGE.committime
     python src/build/util/lastchange.py -o src/build/util/LASTCHANGE
 
+    # Record the synced revision only once everything above succeeded, so a
+    # partial sync is retried on the next run.
+    printf '%s\n' "$REVISION" >$sync_stamp.tmp
+    mv -f $sync_stamp.tmp $sync_stamp
+
     popd >/dev/null
 }
 
@@ -245,21 +383,21 @@ function latest-rev() {
 
 #-----------------------------------------------------------------------------
 function calc-git-revision() {
-    echo -e "\e[39mFetching Git revision\e[39m"
+    echo -e "${C_DEF}Fetching Git revision${C_DEF}"
     if [ ! -z $BRANCH ]; then
         REVISION=$(git ls-remote $REPO_URL --heads $BRANCH | head -n1 | cut -f1) ||
-            { echo -e "\e[91mCound not get branch revision for $BRANCH\e[39m" && exit 1; }
-        [ -z $REVISION ] && echo "Cound not get branch revision for $BRANCH\e[39m" && exit 1
+            { echo -e "${C_RED}Cound not get branch revision for $BRANCH${C_DEF}" && exit 1; }
+        [ -z $REVISION ] && echo -e "${C_RED}Cound not get branch revision for $BRANCH${C_DEF}" && exit 1
     else
         REVISION=${REVISION:-$(latest-rev $REPO_URL)} ||
-            { echo -e "\e[91mCould not get latest revision\e[39m" && exit 1; }
+            { echo -e "${C_RED}Could not get latest revision${C_DEF}" && exit 1; }
     fi
-    echo -e "\e[39mRevision: \e[96m$REVISION\e[39m"
+    echo -e "${C_DEF}Revision: ${C_CYAN}$REVISION${C_DEF}"
 }
 
 #-----------------------------------------------------------------------------
 function verify-webrtc-deps() {
-    echo -e "\e[39mVerifying WebRTC dependencies. You may be prompted to accept software licenses.\e[39m"
+    echo -e "${C_DEF}Verifying WebRTC dependencies. You may be prompted to accept software licenses.${C_DEF}"
     case $HOST_OS in
     "linux")
         sudo $SRC_DIR/src/build/install-build-deps.sh --no-syms --no-arm --no-chromeos-fonts --no-nacl
@@ -271,30 +409,79 @@ function verify-webrtc-deps() {
     fi
 }
 
+#-----------------------------------------------------------------------------
+# Compute GN_ARGS_BASE, the gn arguments shared by every build configuration
+# of this run. TARGET_OS/TARGET_CPU are fixed at config time, so only the
+# per-configuration lines (debug level, symbols) differ between variants;
+# the shared part is serialized once here instead of once per variant.
+# The options are kept one per line, in a fixed order, so the generated
+# args.gn can be compared byte-for-byte across runs.
+function compute-gn-args-base() {
+    GN_ARGS_BASE="\
+is_component_build=false
+treat_warnings_as_errors=false
+enable_iterator_debugging=false
+use_rtti=true
+rtc_include_tests=false
+rtc_build_examples=false
+rtc_build_tools=false
+rtc_use_x11=false
+rtc_enable_protobuf=false
+target_os=\"$TARGET_OS\"
+target_cpu=\"$TARGET_CPU\""
+    # Route compiles through the compiler cache detected by build.sh, if any.
+    [ -z "${CC_WRAPPER:-}" ] || GN_ARGS_BASE+=$'\n'"cc_wrapper=\"$CC_WRAPPER\""
+}
+
 #-----------------------------------------------------------------------------
 function configure-build() {
     local config_path="$TARGET_OS/$TARGET_CPU/$BUILD_CONFIG"
     local outdir="out/$config_path"
-    echo -e "\e[39mGenerating build configuration\e[39m"
-    local args="\
-is_component_build=false \
-treat_warnings_as_errors=false \
-enable_iterator_debugging=false \
-use_rtti=true \
-rtc_include_tests=false \
-rtc_build_examples=false \
-rtc_build_tools=false \
-rtc_use_x11=false \
-rtc_enable_protobuf=false \
-target_os=\"$TARGET_OS\" \
-target_cpu=\"$TARGET_CPU\""
-    [[ "$BUILD_CONFIG" == "Debug" && "$TARGET_OS" == "android" ]] && args+=" android_full_debug=true" || true
-    [[ "$BUILD_CONFIG" == "Debug" ]] && args+=" is_debug=true symbol_level=2" || true
-    [[ "$BUILD_CONFIG" == "Release" ]] && args+=" is_debug=false symbol_level=0" || true
-    echo -e "\e[90m$args\e[39m"
+    echo -e "${C_DEF}Generating build configuration${C_DEF}"
+    local args=$GN_ARGS_BASE
+    [[ "$BUILD_CONFIG" == "Debug" && "$TARGET_OS" == "android" ]] && args+=$'\n'"android_full_debug=true" || true
+    [[ "$BUILD_CONFIG" == "Debug" ]] && args+=$'\n'"is_debug=true"$'\n'"symbol_level=2" || true
+    [[ "$BUILD_CONFIG" == "Release" ]] && args+=$'\n'"is_debug=false"$'\n'"symbol_level=0" || true
+    echo -e "${C_GRAY}$args${C_DEF}"
+
+    # Key the actual output directory on a hash of the full argument set, so
+    # a change to any gn option lands in its own tree instead of silently
+    # reusing (and invalidating) the state of an unrelated previous build.
+    # A symlink at the plain out/<os>/<cpu>/<config> path points at the
+    # current hashed tree, keeping the paths used by the rest of the build
+    # (ninja, packaging, the generated CMake/gradle configs) stable.
+    local hash
+    hash=$(printf '%s\n' "$args" | sha1sum)
+    local hashed_outdir="$outdir-${hash:0:16}"
 
     pushd "$SRC_DIR/src" >/dev/null
-    gn gen $outdir --args="$args"
+    # Migrate an output tree from before hash-keyed directories: move it
+    # into place (its incremental state stays usable; the args.gn check
+    # below reconfigures it if needed), or drop it if a hashed tree already
+    # exists.
+    if [[ -d $outdir && ! -L $outdir ]]; then
+        if [ ! -e "$hashed_outdir" ]; then
+            mv "$outdir" "$hashed_outdir"
+        else
+            rm -rf "$outdir"
+        fi
+    fi
+    # gn gen on the WebRTC tree is slow (BUILD.gn re-evaluation dominates);
+    # when the build arguments are identical to the previous run and the
+    # ninja files already exist, skip it and let ninja rebuild incrementally.
+    if [[ -f "$hashed_outdir/args.gn" && -f "$hashed_outdir/build.ninja" ]] &&
+        [ "$(cat "$hashed_outdir/args.gn")" = "$args" ]; then
+        echo -e "${C_DEF}Build arguments unchanged; skipping gn gen${C_DEF}"
+    else
+        mkdir -p "$hashed_outdir"
+        # Write args.gn atomically (tmp + rename) so an interrupted write
+        # cannot wedge the skip check of a later run.
+        printf '%s\n' "$args" >"$hashed_outdir/args.gn.tmp"
+        mv -f "$hashed_outdir/args.gn.tmp" "$hashed_outdir/args.gn"
+        "$GN_BIN" gen "$hashed_outdir"
+    fi
+    # Repoint the stable path at the current hashed tree.
+    ln -sfn "${hashed_outdir##*/}" "$outdir"
     popd >/dev/null
 }
 
@@ -302,16 +489,20 @@ target_cpu=\"$TARGET_CPU\""
 function compile-webrtc() {
     local config_path="$TARGET_OS/$TARGET_CPU/$BUILD_CONFIG"
     local outdir="out/$config_path"
-    echo -e "\e[39mCompiling WebRTC library\e[39m"
+    echo -e "${C_DEF}Compiling WebRTC library${C_DEF}"
 
+    # NINJA_JOBS is set by build.sh when several variants build concurrently,
+    # so that the parallel ninja invocations share the cores evenly. When
+    # empty, ninja picks its own default parallelism.
+    local jobs=${NINJA_JOBS:-}
     pushd "$SRC_DIR/src/$outdir" >/dev/null
-    ninja -C .
+    "$NINJA_BIN" -C . ${jobs:+-j $jobs}
     popd >/dev/null
 }
 
 #-----------------------------------------------------------------------------
 function package-android-archive() {
-    echo -e "\e[39mPackaging Android Archive\e[39m"
+    echo -e "${C_DEF}Packaging Android Archive${C_DEF}"
     local config_path="$TARGET_OS/$TARGET_CPU/$BUILD_CONFIG"
     local outdir="out/$config_path"
     local arch=""
@@ -325,10 +516,8 @@ function package-android-archive() {
     pushd "$SRC_DIR/src/$outdir" >/dev/null
 
     rm -f libwebrtc.aar
-    [ -d .aar ] && rm -rf .aar || true
-    mkdir .aar
-    mkdir .aar/jni
-    mkdir .aar/jni/$arch
+    rm -rf .aar
+    mkdir -p .aar/jni/$arch
     cp libjingle_peerconnection_so.so .aar/jni/$arch
     cp "$SRC_DIR/src/sdk/android/AndroidManifest.xml" .aar/AndroidManifest.xml
     cp lib.java/sdk/android/libwebrtc.jar .aar/classes.jar